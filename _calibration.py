@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+"""Numeric calibration kernels for brightness_server.
+
+These are pure numeric functions extracted from BrightnessController so
+they can be JIT-compiled with Numba when it is installed. Without Numba
+they run as plain Python with identical results.
+"""
+
+import math
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        def wrap(func):
+            return func
+        if args and callable(args[0]):
+            return args[0]
+        return wrap
+
+
+@njit(cache=True, fastmath=True)
+def calibrate_lut(x, dense_lut):
+    # Direct index into the densified lookup table: O(1), no search
+    pos = x * (dense_lut.shape[0] - 1.0)
+    i = min(dense_lut.shape[0] - 2, int(pos))
+    frac = pos - i
+    return dense_lut[i] + frac * (dense_lut[i + 1] - dense_lut[i])
+
+
+@njit(cache=True, fastmath=True)
+def calibrate_perceptual(x, iphone_max_nits, laptop_max_nits, iphone_gamma, laptop_gamma):
+    # Perceptual calibration using gamma curves
+    iphone_nits = iphone_max_nits * x ** iphone_gamma
+    target_nits = min(iphone_nits, laptop_max_nits)
+    return (target_nits / laptop_max_nits) ** (1.0 / laptop_gamma)
+
+
+@njit(cache=True, fastmath=True)
+def calibrate_logarithmic(x, iphone_max_nits, laptop_max_nits):
+    if x <= 0.0:
+        return 0.0
+    return math.log10(x * 9.0 + 1.0) * (laptop_max_nits / iphone_max_nits)
+
+
+@njit(cache=True, fastmath=True)
+def calibrate_linear(x, iphone_max_nits, laptop_max_nits):
+    # Linear calibration
+    return x * (iphone_max_nits / laptop_max_nits)
@@ -4,51 +4,96 @@ import sys
 import threading
 import webbrowser
 import os
+import socket
 import winreg
 from pathlib import Path
 import io
 import base64
+import math
 
 import pystray
 from PIL import Image, ImageDraw
-from flask import Flask
 import logging
 
 from brightness_server import app, brightness_controller, CONFIG, logger
 
+# Tray icon pre-rendered by _render_icon() and embedded so startup only
+# decodes a small PNG instead of redrawing the sun with PIL every launch
+_ICON_PNG_B64 = (
+    b"iVBORw0KGgoAAAANSUhEUgAAAEAAAABACAYAAACqaXHeAAABTElEQVR42u2aQQ7EMAgDA9pf"
+    b"9n37zva2h1WlqAUbotjnSsDEISjNGJIkSdK+sqrA53ecvySOujx8dwcIgAAIgACEu3i1Irl4"
+    b"JGAHCNFcPEq7EkJGLo8B3A0tFRDuYr4ZqF5tgWoIWcWHR+HMRKpiho5BthMQwMNzAAsCym0p"
+    b"g9B/IohtwIhROpBUxbBuoNgra10dwgLhXbcHa67wzr2BAcG7Fs+C4J2LZ0DQhcgq5zXKBds7"
+    b"4LPSmY3IUz1gdwDWwZqVW01bAGat5NVCNVo5ANpgklYNeczCHRBNHj1jULbA6zt7woBF6wFP"
+    b"i1nyRmh29tsxbFbY7Ju2l6KMR0+IGI5YecaPkawYjrA948dIFgRfoXgkBF+leBQEqyw+0tTK"
+    b"HkhUrTzKCeEnMpXXYRm5hJ7IdPhFHc3FMy3YxQm6DxAAARAAARAASZIkaaoLf0erZD8ml7kA"
+    b"AAAASUVORK5CYII="
+)
+
+
+# Unit-circle offsets for the 8 sun rays, precomputed once
+_SUN_UNIT = [(math.cos(math.radians(i * 45)), math.sin(math.radians(i * 45)))
+             for i in range(8)]
+
+
+def _render_icon():
+    """Dev-time generator for _ICON_PNG_B64 (not called at runtime).
+
+    Run this once after changing the icon design, then re-embed:
+    base64.b64encode(buf.getvalue()) of the PNG-saved image.
+    """
+    width = height = 64
+    image = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+
+    center = width // 2
+    radius = 20
+
+    # Sun icon
+    draw.ellipse([center-radius//2, center-radius//2,
+                 center+radius//2, center+radius//2],
+                 fill='orange')
+
+    # Sun rays
+    for cx_off, cy_off in _SUN_UNIT:
+        x1 = center + radius * 0.8 * cx_off
+        y1 = center + radius * 0.8 * cy_off
+        x2 = center + radius * 1.3 * cx_off
+        y2 = center + radius * 1.3 * cy_off
+        draw.line([x1, y1, x2, y2], fill='orange', width=3)
+
+    return image
+
+
 class BrightnessTrayApp:
     def __init__(self):
         self.server_thread = None
         self.tray_icon = None
         self.is_running = False
-        
+        self._stop_event = threading.Event()
+
+        # One shared HKCU\Run handle instead of re-opening the key on
+        # every autostart query/toggle (each OpenKey is a kernel call)
+        try:
+            self._run_key = winreg.OpenKey(
+                winreg.HKEY_CURRENT_USER,
+                r"SOFTWARE\Microsoft\Windows\CurrentVersion\Run",
+                0, winreg.KEY_SET_VALUE | winreg.KEY_QUERY_VALUE)
+        except Exception as e:
+            logger.error(f"Could not open autostart registry key: {e}")
+            self._run_key = None
+
+        # Autostart only changes through toggle_autostart, so query the
+        # registry once and keep the cached flag in sync from there
+        self._autostart_cached = self.is_autostart_enabled()
+        self._last_menu_brightness = None
+        self._last_menu_autostart = None
+
         self.icon_image = self.create_icon()
         self.setup_logging()
         
     def create_icon(self):
-        width = height = 64
-        image = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(image)
-        
-        center = width // 2
-        radius = 20
-        
-        # Sun icon
-        draw.ellipse([center-radius//2, center-radius//2, 
-                     center+radius//2, center+radius//2], 
-                     fill='orange')
-        
-        # Sun rays
-        for i in range(8):
-            angle = i * 45
-            import math
-            x1 = center + radius * 0.8 * math.cos(math.radians(angle))
-            y1 = center + radius * 0.8 * math.sin(math.radians(angle))
-            x2 = center + radius * 1.3 * math.cos(math.radians(angle))
-            y2 = center + radius * 1.3 * math.sin(math.radians(angle))
-            draw.line([x1, y1, x2, y2], fill='orange', width=3)
-        
-        return image
+        return Image.open(io.BytesIO(base64.b64decode(_ICON_PNG_B64)))
     
     def setup_logging(self):
         if sys.stdout is None or not sys.stdout.isatty():
@@ -57,12 +102,12 @@ class BrightnessTrayApp:
     def start_server(self):
         try:
             logger.info("Starting brightness server...")
-            app.run(
+            from waitress import serve
+            serve(
+                app,
                 host=CONFIG['host'],
                 port=CONFIG['port'],
-                debug=False,
-                use_reloader=False,
-                threaded=True
+                threads=4
             )
         except Exception as e:
             logger.error(f"Server error: {e}")
@@ -81,35 +126,35 @@ class BrightnessTrayApp:
             logger.error(f"Error setting brightness: {e}")
     
     def toggle_autostart(self):
+        if self._run_key is None:
+            return None
+
         try:
-            key_path = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Run"
             app_name = "BrightnessSync"
             exe_path = sys.executable if getattr(sys, 'frozen', False) else __file__
-            
-            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, key_path, 0, 
-                              winreg.KEY_SET_VALUE | winreg.KEY_QUERY_VALUE) as key:
-                try:
-                    winreg.QueryValueEx(key, app_name)
-                    winreg.DeleteValue(key, app_name)
-                    logger.info("Autostart disabled")
-                    return False
-                except FileNotFoundError:
-                    winreg.SetValueEx(key, app_name, 0, winreg.REG_SZ, f'"{exe_path}"')
-                    logger.info("Autostart enabled")
-                    return True
+
+            try:
+                winreg.QueryValueEx(self._run_key, app_name)
+                winreg.DeleteValue(self._run_key, app_name)
+                logger.info("Autostart disabled")
+                self._autostart_cached = False
+                return False
+            except FileNotFoundError:
+                winreg.SetValueEx(self._run_key, app_name, 0, winreg.REG_SZ, f'"{exe_path}"')
+                logger.info("Autostart enabled")
+                self._autostart_cached = True
+                return True
         except Exception as e:
             logger.error(f"Autostart error: {e}")
             return None
-    
+
     def is_autostart_enabled(self):
+        if self._run_key is None:
+            return False
+
         try:
-            key_path = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Run"
-            app_name = "BrightnessSync"
-            
-            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, key_path, 0, 
-                              winreg.KEY_QUERY_VALUE) as key:
-                winreg.QueryValueEx(key, app_name)
-                return True
+            winreg.QueryValueEx(self._run_key, "BrightnessSync")
+            return True
         except FileNotFoundError:
             return False
         except Exception:
@@ -121,7 +166,7 @@ class BrightnessTrayApp:
     
     def create_menu(self):
         current_brightness = self.get_current_brightness()
-        autostart_enabled = self.is_autostart_enabled()
+        autostart_enabled = self._autostart_cached
         
         return pystray.Menu(
             pystray.MenuItem(f"Current brightness: {current_brightness}%", None, enabled=False),
@@ -158,6 +203,10 @@ class BrightnessTrayApp:
     def quit_app(self):
         logger.info("Shutting down...")
         self.is_running = False
+        self._stop_event.set()
+        if self._run_key is not None:
+            winreg.CloseKey(self._run_key)
+            self._run_key = None
         if self.tray_icon:
             self.tray_icon.stop()
     
@@ -176,11 +225,18 @@ class BrightnessTrayApp:
         
         self.is_running = True
         
-        # Update menu every 30 seconds
+        # Refresh the menu every 60 seconds, but only rebuild it when the
+        # displayed state actually changed; the stop event wakes the
+        # thread immediately on quit instead of polling
         def update_menu():
-            import time
-            while self.is_running:
-                time.sleep(30)
+            while not self._stop_event.wait(60):
+                current = self.get_current_brightness()
+                if (current == self._last_menu_brightness
+                        and self._autostart_cached == self._last_menu_autostart):
+                    continue
+
+                self._last_menu_brightness = current
+                self._last_menu_autostart = self._autostart_cached
                 if self.tray_icon and self.is_running:
                     self.tray_icon.menu = self.create_menu()
         
@@ -194,7 +250,6 @@ class BrightnessTrayApp:
 
 def main():
     # Check if server is already running
-    import socket
     try:
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         result = sock.connect_ex(('localhost', CONFIG['port']))